@@ -1,7 +1,11 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, session
 import json
 import os
 import secrets
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from urllib.parse import urlparse
 import pymongo
@@ -11,6 +15,17 @@ import json
 import re
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from link_checker import STATUS_FILE, load_link_status, link_flag
+
+# Optional faster JSON encoder and brotli compression
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -32,6 +47,17 @@ DB_NAME = os.getenv("DB_NAME", "keygo_bookmarks")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "bookmarks")
 USER_COLLECTION = "users"  # Collection for storing user accounts
 
+# Response compression settings
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))  # Bytes
+COMPRESS_MIMETYPES = ('application/json', 'text/html')
+COMPRESS_CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", 16 * 1024 * 1024))  # Total bytes kept in memory
+compressed_cache = OrderedDict()
+compressed_cache_bytes = 0
+compressed_cache_lock = threading.Lock()  # The dev server handles requests in threads
+
+# Parsed link checker results, reloaded when the status file changes
+link_status_cache = {'mtime': None, 'statuses': {}}
+
 # Connect to MongoDB
 try:
     client = pymongo.MongoClient(
@@ -183,6 +209,87 @@ def validate_url(url):
     except:
         return False
 
+def json_response(data):
+    """Serialize data to a compact JSON response"""
+    body = None
+    if orjson:
+        try:
+            body = orjson.dumps(data)
+        except TypeError:
+            # Fall back to the standard encoder for unsupported types
+            body = None
+    if body is None:
+        body = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return app.response_class(body, mimetype='application/json')
+
+def get_link_status():
+    """Return the link checker results, re-reading the file only when it changes"""
+    try:
+        mtime = os.path.getmtime(STATUS_FILE)
+    except OSError:
+        return {}
+    if link_status_cache['mtime'] != mtime:
+        # Swap both values at once so concurrent requests see a consistent pair
+        link_status_cache.update(mtime=mtime, statuses=load_link_status(STATUS_FILE))
+    return link_status_cache['statuses']
+
+def compress_body(data, etag, encoding):
+    """Compress a response body, reusing cached results for an unchanged ETag"""
+    global compressed_cache_bytes
+    key = (etag, encoding)
+    with compressed_cache_lock:
+        compressed = compressed_cache.get(key)
+        if compressed is not None:
+            compressed_cache.move_to_end(key)
+            return compressed
+    
+    # Compress outside the lock, using levels suited to dynamic content.
+    # gzip gets a fixed mtime so the same ETag always maps to the same bytes.
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=5)
+    else:
+        compressed = gzip.compress(data, compresslevel=6, mtime=0)
+    
+    if len(compressed) <= COMPRESS_CACHE_BYTES:
+        with compressed_cache_lock:
+            if key not in compressed_cache:
+                compressed_cache[key] = compressed
+                compressed_cache_bytes += len(compressed)
+                while compressed_cache_bytes > COMPRESS_CACHE_BYTES:
+                    _, evicted = compressed_cache.popitem(last=False)
+                    compressed_cache_bytes -= len(evicted)
+    return compressed
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON and HTML responses when the client accepts it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings)
+    if not encoding:
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    # Each encoding is a separate representation, so it gets its own ETag.
+    # Answer conditional requests before spending CPU on compression.
+    etag = hashlib.sha1(data).hexdigest()
+    response.set_etag(f'{etag}-{encoding}')
+    response.make_conditional(request)
+    if response.status_code != 200:
+        return response
+    
+    response.set_data(compress_body(data, etag, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 def is_valid_password(password):
     """Check if password meets requirements"""
     # At least 8 characters, at least one letter and one number
@@ -448,11 +555,18 @@ def list_bookmarks():
             bookmarks = load_bookmarks(current_user.id)
         else:
             bookmarks = load_bookmarks()
-        return jsonify(bookmarks)
+        
+        # Flag dead links using the results of the offline link checker
+        statuses = get_link_status()
+        for data in bookmarks.values():
+            if isinstance(data, dict):
+                data['link_status'] = link_flag(statuses.get(data.get('url')))
+        
+        return json_response(bookmarks)
     except Exception as e:
         print(f"Error listing bookmarks: {e}")
         # Return empty list if error occurs
-        return jsonify({})
+        return json_response({})
 
 @app.route('/delete/<custom_name>', methods=['POST'])
 @login_required
@@ -664,7 +778,7 @@ def export_bookmarks():
                 if '_id' in doc:
                     doc['_id'] = str(doc['_id'])
             
-            return jsonify(bookmarks_list)
+            return json_response(bookmarks_list)
     except Exception as e:
         print(f"Export error: {e}")
     
@@ -672,7 +786,7 @@ def export_bookmarks():
     bookmarks = load_bookmarks(
         current_user.id if current_user.is_authenticated else None
     )
-    return jsonify(bookmarks)
+    return json_response(bookmarks)
 
 # Create a static folder if it doesn't exist
 @app.route('/static/<path:filename>')
@@ -0,0 +1,247 @@
+"""Offline link health checker for KeyGo bookmarks.
+
+Run it periodically (e.g. from cron) to record which bookmarked URLs are dead:
+
+    python link_checker.py
+
+Results are kept in a compact JSON status store that /list_bookmarks reads
+to flag broken links.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+# Link checker settings from environment variables
+STATUS_FILE = os.getenv("LINK_STATUS_FILE", "link_status.json")
+CHECK_TIMEOUT = float(os.getenv("LINK_CHECK_TIMEOUT", 10))  # Seconds per socket operation
+CHECK_DEADLINE = float(os.getenv("LINK_CHECK_DEADLINE", 30))  # Seconds per link, DNS included
+CHECK_WORKERS = int(os.getenv("LINK_CHECK_WORKERS", 20))
+PER_HOST_LIMIT = int(os.getenv("LINK_CHECK_PER_HOST", 2))  # Concurrent requests per host
+RECHECK_AFTER = int(os.getenv("LINK_RECHECK_AFTER", 24 * 60 * 60))  # Seconds
+USER_AGENT = "KeyGo-LinkChecker/1.0"
+
+# Status store entries are lists to keep the file small:
+# [http_status, checked_at, etag, last_modified, failures]
+# http_status is 0 when the host could not be reached at all, and failures
+# counts how many checks in a row ended that way.
+STATUS, CHECKED_AT, ETAG, LAST_MODIFIED, FAILURES = range(5)
+
+# Statuses that usually mean the checker was turned away, not that the link is dead
+BLOCKED_STATUSES = (401, 403, 429)
+
+# Unreachable links are only reported once this many checks in a row fail
+MAX_FAILURES = 2
+
+
+def load_link_status(path=STATUS_FILE):
+    """Load the link status store, keyed by URL"""
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            try:
+                return json.load(f)
+            except ValueError:
+                return {}
+    return {}
+
+
+def save_link_status(statuses, path=STATUS_FILE):
+    """Write the link status store atomically"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(statuses, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def link_flag(entry):
+    """Summarize a status store entry as 'ok', 'broken' or 'unknown'"""
+    if not entry:
+        return 'unknown'
+    status = entry[STATUS]
+    if status == 0:
+        return 'broken' if entry[FAILURES] >= MAX_FAILURES else 'unknown'
+    if status in BLOCKED_STATUSES:
+        return 'unknown'
+    if status >= 400:
+        return 'broken'
+    return 'ok'
+
+
+class KeepMethodRedirectHandler(HTTPRedirectHandler):
+    """Follow redirects without turning HEAD requests into GET"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new_req = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new_req is not None and req.get_method() == 'HEAD':
+            new_req.method = 'HEAD'
+        return new_req
+
+
+opener = build_opener(KeepMethodRedirectHandler)
+
+
+def fetch_status(url, entry=None, timeout=CHECK_TIMEOUT):
+    """Check a single URL, trying HEAD first and falling back to GET
+
+    Returns (status, etag, last_modified). Validators from a previous check
+    are sent so unchanged pages can answer with 304 Not Modified.
+    """
+    headers = {'User-Agent': USER_AGENT}
+    if entry:
+        if entry[ETAG]:
+            headers['If-None-Match'] = entry[ETAG]
+        if entry[LAST_MODIFIED]:
+            headers['If-Modified-Since'] = entry[LAST_MODIFIED]
+
+    status = 0
+    for method in ('HEAD', 'GET'):
+        try:
+            with opener.open(Request(url, headers=headers, method=method), timeout=timeout) as resp:
+                return resp.status, resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+        except HTTPError as e:
+            e.close()
+            if e.code == 304 and entry:
+                # Unchanged since the last check, keep the previous result
+                return entry[STATUS], entry[ETAG], entry[LAST_MODIFIED]
+            # Some servers reject HEAD, so retry errors with GET
+            status = e.code
+        except (URLError, OSError, ValueError, http.client.HTTPException):
+            # Unreachable host, timeout, malformed URL or a garbled response;
+            # GET won't fare better
+            return 0, None, None
+    return status, None, None
+
+
+def select_urls(bookmarks, statuses, recheck_after=RECHECK_AFTER, now=None):
+    """Pick URLs that are due for a check, most visited first"""
+    if now is None:
+        now = time.time()
+
+    visits = {}
+    for data in bookmarks:
+        # Skip the legacy format where a bookmark is just a URL string
+        if not isinstance(data, dict):
+            continue
+        url = data.get('url')
+        if not url or urlparse(url).scheme not in ('http', 'https'):
+            continue
+        visits[url] = visits.get(url, 0) + data.get('visits', 0)
+
+    due = [
+        url for url in visits
+        if url not in statuses or now - statuses[url][CHECKED_AT] >= recheck_after
+    ]
+    return sorted(due, key=lambda url: visits[url], reverse=True)
+
+
+async def check_links(urls, statuses, workers=CHECK_WORKERS, per_host=PER_HOST_LIMIT,
+                      timeout=CHECK_TIMEOUT, deadline=CHECK_DEADLINE):
+    """Check URLs with a pool of async workers and update statuses in place"""
+    if not urls:
+        return statuses
+
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    loop = asyncio.get_running_loop()
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+    workers = min(workers, len(urls))
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def worker():
+        skipped = 0
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            host_limit = host_limits[urlparse(url).netloc.lower()]
+            if host_limit.locked() and skipped < queue.qsize():
+                # Host is at its limit, so move on to URLs for other hosts first
+                queue.put_nowait(url)
+                skipped += 1
+                continue
+            skipped = 0
+
+            previous = statuses.get(url)
+            try:
+                async with host_limit:
+                    status, etag, last_modified = await asyncio.wait_for(
+                        loop.run_in_executor(executor, fetch_status, url, previous, timeout),
+                        deadline
+                    )
+            except asyncio.TimeoutError:
+                # Slow DNS or a server dripping bytes; the thread is abandoned
+                status, etag, last_modified = 0, None, None
+            except Exception as e:
+                # One misbehaving URL must not abort the whole run
+                print(f"Error checking {url}: {e}")
+                status, etag, last_modified = 0, None, None
+
+            failures = 0
+            if status == 0:
+                failures = 1
+                if previous and previous[STATUS] == 0:
+                    failures += previous[FAILURES]
+            statuses[url] = [status, int(time.time()), etag, last_modified, failures]
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        # Don't wait for threads stuck past their deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return statuses
+
+
+def load_all_bookmarks():
+    """Load every user's bookmarks as a list of dicts"""
+    # Imported here because app imports this module for the status store
+    import app
+    if app.bookmarks_collection is not None:
+        return list(app.bookmarks_collection.find({}, {'_id': 0, 'url': 1, 'visits': 1}))
+    return list(app.load_bookmarks().values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check bookmarked URLs for dead links")
+    parser.add_argument('--all', action='store_true', help="recheck every URL, not just stale ones")
+    parser.add_argument('--limit', type=int, help="maximum number of URLs to check in this run")
+    args = parser.parse_args()
+
+    bookmarks = load_all_bookmarks()
+    statuses = load_link_status()
+
+    # Drop results for URLs that are no longer bookmarked
+    bookmarked = {data.get('url') for data in bookmarks if isinstance(data, dict)}
+    statuses = {url: entry for url, entry in statuses.items() if url in bookmarked}
+
+    urls = select_urls(bookmarks, statuses, recheck_after=0 if args.all else RECHECK_AFTER)
+    if args.limit is not None:
+        urls = urls[:args.limit]
+
+    print(f"Checking {len(urls)} links...")
+    try:
+        asyncio.run(check_links(urls, statuses))
+    finally:
+        # Keep whatever was checked, even if the run is interrupted
+        save_link_status(statuses)
+
+    broken = sum(1 for url in urls if link_flag(statuses.get(url)) == 'broken')
+    print(f"Done: {broken} broken out of {len(urls)} checked.")
+
+
+if __name__ == '__main__':
+    main()
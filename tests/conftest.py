@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the app off the real database so it falls back to local storage
+os.environ['MONGODB_URI'] = 'mongodb://127.0.0.1:1'
+
+
+@pytest.fixture
+def keygo_app(monkeypatch):
+    import app
+    monkeypatch.setattr(app.login_manager, '_user_callback',
+                        lambda user_id: app.User(user_id, 'tester', 'tester@example.com'))
+    return app
+
+
+@pytest.fixture
+def client(keygo_app):
+    client = keygo_app.app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = 'tester'
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,87 @@
+import gzip
+import json
+
+import pytest
+
+
+@pytest.fixture
+def bookmarks(keygo_app, monkeypatch):
+    """Serve a fixed collection from /list_bookmarks, large enough to compress"""
+    data = {
+        f'site{i}': {'url': f'http://site{i}.example', 'notes': 'note ' * 20, 'visits': i}
+        for i in range(50)
+    }
+    monkeypatch.setattr(keygo_app, 'load_bookmarks', lambda *args: data)
+    monkeypatch.setattr(keygo_app, 'get_link_status', lambda: {})
+    return data
+
+
+def test_gzip_when_accepted(client, bookmarks):
+    response = client.get('/list_bookmarks', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)).keys() == bookmarks.keys()
+
+
+def test_identity_is_not_compressed(client, bookmarks):
+    response = client.get('/list_bookmarks', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.data).keys() == bookmarks.keys()
+
+
+def test_small_body_passes_through(client, keygo_app, monkeypatch):
+    monkeypatch.setattr(keygo_app, 'load_bookmarks', lambda *args: {})
+    response = client.get('/list_bookmarks', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'ETag' not in response.headers
+    assert response.data == b'{}'
+
+
+def test_matching_etag_gets_304_without_compressing(client, keygo_app, bookmarks, monkeypatch):
+    first = client.get('/list_bookmarks', headers={'Accept-Encoding': 'gzip'})
+    etag = first.headers['ETag']
+
+    def fail_compress(*args):
+        raise AssertionError('body compressed for a 304')
+
+    monkeypatch.setattr(keygo_app, 'compress_body', fail_compress)
+    response = client.get('/list_bookmarks', headers={
+        'Accept-Encoding': 'gzip',
+        'If-None-Match': etag,
+    })
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+
+
+@pytest.fixture
+def empty_cache(keygo_app):
+    keygo_app.compressed_cache.clear()
+    keygo_app.compressed_cache_bytes = 0
+    yield
+    keygo_app.compressed_cache.clear()
+    keygo_app.compressed_cache_bytes = 0
+
+
+def test_gzip_output_is_deterministic(keygo_app, empty_cache):
+    compressed = keygo_app.compress_body(b'x' * 4096, 'etag', 'gzip')
+    # Bytes 4-8 of the gzip header hold the modification time
+    assert compressed[4:8] == b'\x00\x00\x00\x00'
+
+
+def test_cache_is_limited_by_bytes(keygo_app, empty_cache, monkeypatch):
+    monkeypatch.setattr(keygo_app, 'COMPRESS_CACHE_BYTES', 100)
+    for i in range(10):
+        keygo_app.compress_body(str(i).encode() * 50, f'etag{i}', 'gzip')
+    cached = sum(len(body) for body in keygo_app.compressed_cache.values())
+    assert 0 < cached <= 100
+    assert keygo_app.compressed_cache_bytes == cached
+
+
+def test_json_response_falls_back_for_unsupported_types(keygo_app):
+    # orjson rejects non-str keys with a TypeError
+    response = keygo_app.json_response({1: 'one'})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == {'1': 'one'}
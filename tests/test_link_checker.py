@@ -0,0 +1,232 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import link_checker
+from link_checker import check_links, fetch_status, link_flag, select_urls
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves canned responses based on the request path"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        if self.path == '/nohead':
+            self.send_response(405)
+            self.end_headers()
+            return
+        self.respond(body=False)
+
+    def do_GET(self):
+        self.respond(body=True)
+
+    def respond(self, body):
+        self.server.requests.append((self.command, self.path, dict(self.headers), time.monotonic()))
+        if self.path == '/missing':
+            self.send_response(404)
+            self.end_headers()
+        elif self.path == '/slow':
+            time.sleep(1)
+            self.send_response(200)
+            self.end_headers()
+        elif self.path.startswith('/pause'):
+            time.sleep(0.3)
+            self.send_response(200)
+            self.end_headers()
+        elif self.path == '/drip':
+            # Every read finishes quickly, but the response never completes
+            self.send_response(200)
+            for i in range(20):
+                self.send_header(f'X-Drip-{i}', 'x')
+                self.flush_headers()
+                time.sleep(0.1)
+            self.end_headers()
+        elif self.path == '/moved':
+            self.send_response(301)
+            self.send_header('Location', '/page')
+            self.end_headers()
+        elif self.path == '/garbage':
+            self.wfile.write(b'GARBAGE\r\n\r\n')
+        elif self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            if body:
+                self.wfile.write(b'ok')
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_for(server, path):
+    return f'http://127.0.0.1:{server.server_port}{path}'
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_head_rejected_falls_back_to_get(server):
+    status, etag, _ = fetch_status(url_for(server, '/nohead'))
+    assert status == 200
+    assert etag == '"v1"'
+    assert [request[0] for request in server.requests] == ['GET']
+
+
+def test_redirect_keeps_head(server):
+    status, _, _ = fetch_status(url_for(server, '/moved'))
+    assert status == 200
+    assert [(method, path) for method, path, _, _ in server.requests] == [
+        ('HEAD', '/moved'),
+        ('HEAD', '/page'),
+    ]
+
+
+def test_missing_page_is_broken(server):
+    status, _, _ = fetch_status(url_for(server, '/missing'))
+    assert status == 404
+    assert link_flag([status, 0, None, None, 0]) == 'broken'
+
+
+def test_revalidation_keeps_previous_status(server):
+    previous = [200, 0, '"v1"', None, 0]
+    assert fetch_status(url_for(server, '/page'), previous) == (200, '"v1"', None)
+    _, _, headers, _ = server.requests[0]
+    assert headers['If-None-Match'] == '"v1"'
+
+
+def test_timeout_gives_status_zero(server):
+    assert fetch_status(url_for(server, '/slow'), timeout=0.2) == (0, None, None)
+
+
+def test_deadline_covers_whole_check(server):
+    url = url_for(server, '/drip')
+    started = time.monotonic()
+    statuses = asyncio.run(check_links([url], {}, timeout=0.5, deadline=0.5))
+    assert time.monotonic() - started < 1.5
+    assert statuses[url][0] == 0
+
+
+def test_busy_host_does_not_block_other_hosts(server):
+    busy = [url_for(server, f'/pause?{i}') for i in range(3)]
+    other = f'http://localhost:{server.server_port}/page'
+    asyncio.run(check_links(busy + [other], {}, workers=2, per_host=1))
+    order = [headers['Host'].split(':')[0] for _, _, headers, _ in server.requests]
+    # The other host is served while the busy host's first check is running
+    assert order.index('localhost') == 1
+
+
+def test_unreachable_host_gives_status_zero():
+    assert fetch_status(f'http://127.0.0.1:{unused_port()}/') == (0, None, None)
+
+
+def test_malformed_response_does_not_abort_run(server):
+    urls = [url_for(server, '/garbage'), url_for(server, '/page')]
+    statuses = asyncio.run(check_links(urls, {}))
+    assert statuses[urls[0]][0] == 0
+    assert statuses[urls[1]][0] == 200
+
+
+def test_worker_survives_unexpected_errors(server, monkeypatch):
+    real_fetch = link_checker.fetch_status
+
+    def flaky_fetch(url, entry=None, timeout=None):
+        if url.endswith('/boom'):
+            raise RuntimeError('boom')
+        return real_fetch(url, entry, timeout)
+
+    monkeypatch.setattr(link_checker, 'fetch_status', flaky_fetch)
+    urls = [url_for(server, '/boom'), url_for(server, '/page')]
+    statuses = asyncio.run(check_links(urls, {}))
+    assert statuses[urls[0]][0] == 0
+    assert statuses[urls[1]][0] == 200
+
+
+def test_consecutive_failures_are_counted():
+    url = f'http://127.0.0.1:{unused_port()}/'
+    statuses = asyncio.run(check_links([url], {}))
+    assert link_flag(statuses[url]) == 'unknown'
+    statuses = asyncio.run(check_links([url], statuses))
+    assert statuses[url][link_checker.FAILURES] == 2
+    assert link_flag(statuses[url]) == 'broken'
+
+
+def test_select_urls_orders_by_visits_and_skips_fresh():
+    bookmarks = [
+        {'url': 'http://a.example', 'visits': 1},
+        {'url': 'http://b.example', 'visits': 7},
+        {'url': 'http://c.example', 'visits': 3},
+        {'url': 'http://fresh.example', 'visits': 9},
+        {'url': 'ftp://files.example', 'visits': 5},
+        'http://legacy.example',
+    ]
+    statuses = {
+        'http://c.example': [200, 0, None, None, 0],
+        'http://fresh.example': [200, 1000, None, None, 0],
+    }
+    urls = select_urls(bookmarks, statuses, recheck_after=100, now=1050)
+    assert urls == ['http://b.example', 'http://c.example', 'http://a.example']
+
+
+def test_link_flag():
+    assert link_flag(None) == 'unknown'
+    assert link_flag([200, 0, None, None, 0]) == 'ok'
+    assert link_flag([301, 0, None, None, 0]) == 'ok'
+    assert link_flag([404, 0, None, None, 0]) == 'broken'
+    assert link_flag([500, 0, None, None, 0]) == 'broken'
+    for status in (401, 403, 429):
+        assert link_flag([status, 0, None, None, 0]) == 'unknown'
+    assert link_flag([0, 0, None, None, 1]) == 'unknown'
+    assert link_flag([0, 0, None, None, 2]) == 'broken'
+
+
+def test_list_bookmarks_flags_links(client, keygo_app, tmp_path, monkeypatch):
+    status_file = tmp_path / 'link_status.json'
+    monkeypatch.setattr(keygo_app, 'STATUS_FILE', str(status_file))
+    monkeypatch.setattr(keygo_app, 'link_status_cache', {'mtime': None, 'statuses': {}})
+    monkeypatch.setattr(keygo_app, 'load_bookmarks', lambda *args: {
+        'dead': {'url': 'http://dead.example'},
+        'live': {'url': 'http://live.example'},
+        'new': {'url': 'http://new.example'},
+        'legacy': 'http://legacy.example',
+    })
+
+    status_file.write_text(json.dumps({
+        'http://dead.example': [404, 0, None, None, 0],
+        'http://live.example': [200, 0, None, None, 0],
+    }))
+    data = client.get('/list_bookmarks').get_json()
+    assert data['dead']['link_status'] == 'broken'
+    assert data['live']['link_status'] == 'ok'
+    assert data['new']['link_status'] == 'unknown'
+    assert data['legacy'] == 'http://legacy.example'
+
+    # A rewritten status file is picked up through its new mtime
+    status_file.write_text(json.dumps({'http://dead.example': [200, 0, None, None, 0]}))
+    mtime = os.path.getmtime(status_file) + 10
+    os.utime(status_file, (mtime, mtime))
+    data = client.get('/list_bookmarks').get_json()
+    assert data['dead']['link_status'] == 'ok'
+    assert data['live']['link_status'] == 'unknown'